@@ -1,6 +1,12 @@
 # backend/gemini/call_gemini.py
+import asyncio
+import logging
 import os
 import sys
+from typing import Dict, Optional
+
+import httpx  # type: ignore
+import orjson
 from dotenv import load_dotenv, find_dotenv  # type: ignore
 
 from google import genai  # type: ignore
@@ -21,16 +27,145 @@ if not api_key:
 
 client = genai.Client(api_key=api_key)
 
+# Default model when the caller passes none, read once at import
+DEFAULT_MODEL = os.environ.get("GEMINI_FAST_MODEL", "gemini-2.5-flash")
+
+# Models that get their own rate limiter; any other model name shares a single bucket, so callers
+# can't grow the limiter table (or dodge the rate limit) by sending arbitrary model strings
+_RATE_LIMITED_MODELS = {
+    m.strip()
+    for m in [DEFAULT_MODEL, os.environ.get("GEMINI_STRONG_MODEL") or ""]
+    + os.environ.get("GEMINI_ALLOWED_MODELS", "gemini-2.5-flash,gemini-2.5-pro,gemini-2.5-flash-lite").split(",")
+    if m.strip()
+}
+_SHARED_LIMITER_KEY = "(other models)"
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+# Shared HTTP/2 client for the async path. Opened on FastAPI startup and closed on shutdown (see main.py),
+# so concurrent Gemini calls are multiplexed over one kept-alive TLS connection instead of a handshake per call.
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Create the shared httpx client if it does not exist yet."""
+    global _client
+    if _client is None or _client.is_closed:
+        timeout = httpx.Timeout(float(os.environ.get("GEMINI_TIMEOUT_SECONDS", "120")))
+        _client = httpx.AsyncClient(http2=True, timeout=timeout)
+    return _client
+
+
+async def close_client():
+    """Close the shared httpx client and stop the rate limiters (safe to call more than once)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    for limiter in _limiters.values():
+        limiter.stop()
+    _limiters.clear()
+
+
+class _TokenBucket:
+    """
+    Proactive async rate limiter for one Gemini model.
+
+    Tokens live in an asyncio.Semaphore; a background task adds one token every 60/QPM seconds,
+    up to `burst` tokens. Each call takes a token before it is sent (`async with limiter:`), so
+    bursts are queued locally instead of being rejected by the API with 429. A 429 halves the
+    refill rate; every successful call moves it back towards the configured QPM. Rate changes wake
+    the refill task, so the next token is due `interval` after the previous one at the current rate.
+    """
+
+    def __init__(self, model: str, qpm: float, burst: int):
+        self.model = model
+        self.base_interval = 60.0 / qpm
+        self.interval = self.base_interval
+        self.burst = burst
+        self._tokens = burst
+        self._sem = asyncio.Semaphore(burst)
+        self._rate_changed = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+
+    async def _refill_loop(self):
+        loop = asyncio.get_running_loop()
+        last_refill = loop.time()
+        while True:
+            # recompute the deadline after every wake-up, so a recover() shortens a long throttled wait
+            delay = last_refill + self.interval - loop.time()
+            if delay > 0:
+                self._rate_changed.clear()
+                try:
+                    await asyncio.wait_for(self._rate_changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            last_refill = loop.time()
+            if self._tokens < self.burst:
+                self._tokens += 1
+                self._sem.release()
+
+    async def __aenter__(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_loop())
+        await self._sem.acquire()
+        self._tokens -= 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # tokens are consumed, not returned: only the refill loop adds them back
+        return False
+
+    def throttle(self):
+        """Halve the refill rate after a 429 (never slower than one call per minute)."""
+        self.interval = min(self.interval * 2, 60.0)
+        self._rate_changed.set()
+        logger.warning("Gemini rate limited (429) for %s; throttling to %.1f calls/min", self.model, 60.0 / self.interval)
+
+    def recover(self):
+        """Move the refill rate 10% back towards the configured QPM after a successful call."""
+        if self.interval > self.base_interval:
+            self.interval = max(self.base_interval, self.interval * 0.9)
+            self._rate_changed.set()
+
+    def stop(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            self._refill_task = None
+
+
+_limiters: Dict[str, _TokenBucket] = {}
+
+
+def get_limiter(model: str) -> _TokenBucket:
+    """
+    Return the rate limiter for model, sized from GEMINI_QPM / GEMINI_BURST (created on first use).
+    Models outside the configured set (GEMINI_FAST_MODEL, GEMINI_STRONG_MODEL, GEMINI_ALLOWED_MODELS)
+    share one limiter.
+    """
+    if model not in _RATE_LIMITED_MODELS:
+        model = _SHARED_LIMITER_KEY
+    limiter = _limiters.get(model)
+    if limiter is None:
+        qpm = float(os.environ.get("GEMINI_QPM", "60"))
+        burst = max(1, int(os.environ.get("GEMINI_BURST", "10")))
+        limiter = _TokenBucket(model, qpm, burst)
+        _limiters[model] = limiter
+    return limiter
+
 
 def generate_response(system_prompt: str, prompt: str, model: str = None):
     """
     Generate a response using the Gemini client.
     system_prompt must be provided (string). prompt is the user prompt.
-    model: optional. If None, we will check environment GEMINI_FAST_MODEL, otherwise fall back to 'gemini-2.5-flash'.
+    model: optional. If None, DEFAULT_MODEL is used (GEMINI_FAST_MODEL from the environment, otherwise 'gemini-2.5-flash').
     """
     try:
         # Determine the model to use: explicit argument -> env -> fallback
-        model_to_use = model or os.environ.get("GEMINI_FAST_MODEL", "gemini-2.5-flash")
+        model_to_use = model or DEFAULT_MODEL
 
         # Make sure system_prompt is a string
         system_instruction = system_prompt if isinstance(system_prompt, str) else str(system_prompt)
@@ -51,5 +186,55 @@ def generate_response(system_prompt: str, prompt: str, model: str = None):
         raise RuntimeError(f"API request failed {e}")
 
 
+async def generate_response_async(system_prompt: str, prompt: str, model: str = None, response_schema: dict = None):
+    """
+    Async variant of generate_response that talks to the Gemini REST API over the shared HTTP/2 client.
+    Calls are admitted through the per-model rate limiter (see get_limiter). Same arguments and model resolution as generate_response; returns the response text.
+    response_schema: optional. If given, Gemini's structured-output mode is used
+    (response_mime_type="application/json"), so the returned text is JSON matching the schema.
+    """
+    try:
+        model_to_use = model or DEFAULT_MODEL
+        system_instruction = system_prompt if isinstance(system_prompt, str) else str(system_prompt)
+
+        payload = {
+            "system_instruction": {"parts": [{"text": system_instruction}]},
+            "contents": [{"role": "user", "parts": [{"text": prompt or ""}]}],
+        }
+        if response_schema is not None:
+            payload["generation_config"] = {
+                "response_mime_type": "application/json",
+                "response_schema": response_schema,
+            }
+
+        http = await open_client()
+        limiter = get_limiter(model_to_use)
+        url = f"{GEMINI_API_BASE}/models/{model_to_use}:generateContent"
+        async with limiter:
+            resp = await http.post(
+                url,
+                content=orjson.dumps(payload),
+                # key goes in a header, not the query string, so it never shows up in logged URLs
+                headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+            )
+        if resp.status_code == 429:
+            limiter.throttle()
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}: {resp.text}")
+        limiter.recover()
+        body = orjson.loads(resp.content)
+
+        # Concatenate the text parts of the first candidate (what response.text does in the SDK)
+        candidates = body.get("candidates") or []
+        if not candidates:
+            raise RuntimeError(f"No candidates in response: {body}")
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts if isinstance(p, dict))
+
+    except Exception as e:
+        # propagate so callers may handle/log
+        raise RuntimeError(f"API request failed {e}")
+
+
 if __name__ == "__main__":
     print(generate_response(system_prompt="You are friendly", prompt="Explain to me what gemini is"))
@@ -6,6 +6,9 @@ Parse a Gemini 'latlon' response string into a Python list of dicts:
 This parser is tolerant of small JSON problems (like missing '[' before the pair).
 It will extract lat/lon and an optional country string (lowercased). It does NOT
 look for or return any 'city' field.
+
+normalize_grouped_latlon_lists handles the batched variant (already JSON-decoded), where
+the locations are grouped per input segment: [ {"index": 0, "locations": [...]}, ... ].
 """
 
 import json
@@ -30,28 +33,34 @@ def _normalize_country(val: Any) -> Optional[str]:
         return None
 
 
+def _normalize_latlon_items(obj: Any) -> List[Dict[str, Any]]:
+    """Keep the well-formed {"latlon": [lat, lon], "country": ...} entries of a decoded JSON list."""
+    out: List[Dict[str, Any]] = []
+    if not isinstance(obj, list):
+        return out
+    for item in obj:
+        if not isinstance(item, dict):
+            continue
+        if "latlon" not in item:
+            continue
+        val = item["latlon"]
+        if isinstance(val, (list, tuple)) and len(val) == 2:
+            try:
+                lat = float(val[0])
+                lon = float(val[1])
+            except Exception:
+                continue
+            country = _normalize_country(item.get("country"))
+            out.append({"latlon": [lat, lon], "country": country})
+    return out
+
+
 def _try_json_load(raw: str) -> Optional[List[Dict[str, Any]]]:
     """Try to load raw text as JSON, returning list if successful and well-formed."""
     try:
-        obj = json.loads(raw)
-        if isinstance(obj, list):
-            out: List[Dict[str, Any]] = []
-            for item in obj:
-                if not isinstance(item, dict):
-                    continue
-                if "latlon" not in item:
-                    continue
-                val = item["latlon"]
-                if isinstance(val, (list, tuple)) and len(val) == 2:
-                    try:
-                        lat = float(val[0])
-                        lon = float(val[1])
-                    except Exception:
-                        continue
-                    country = _normalize_country(item.get("country"))
-                    out.append({"latlon": [lat, lon], "country": country})
-            if out:
-                return out
+        out = _normalize_latlon_items(json.loads(raw))
+        if out:
+            return out
     except Exception:
         pass
     return None
@@ -178,6 +187,30 @@ def parse_gemini_latlon_list(raw: str) -> List[Dict[str, Any]]:
     return results
 
 
+def _is_grouped(obj: Any) -> bool:
+    return isinstance(obj, list) and any(isinstance(g, dict) and "locations" in g for g in obj)
+
+
+def normalize_grouped_latlon_lists(obj: Any) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Turn an already-decoded grouped response (e.g. from Gemini's JSON structured-output mode)
+    into {index: [location dicts]}. Raises ValueError if obj is not a grouped array.
+    """
+    if not _is_grouped(obj):
+        raise ValueError("Gemini response is not a grouped JSON array")
+
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for pos, group in enumerate(obj):
+        if not isinstance(group, dict):
+            continue
+        try:
+            idx = int(group.get("index", pos))
+        except (TypeError, ValueError):
+            continue
+        groups.setdefault(idx, []).extend(_normalize_latlon_items(group.get("locations")))
+    return groups
+
+
 # If executed as a script, demonstrate parsing with the sample (for quick manual test)
 if __name__ == "__main__":
     sample = r"""
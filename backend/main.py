@@ -8,15 +8,21 @@ backend_dir = Path(__file__).parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
+from dotenv import load_dotenv, find_dotenv  # type: ignore
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+# Load .env before the routers are imported: they read their configuration once at import time
+load_dotenv(find_dotenv())
+
 # Create FastAPI app
 app = FastAPI(
     title="Well World - Minimal with Gemini",
     description="FastAPI backend exposing simple Gemini endpoints",
     version="1.0.0",
+    # serialize JSON responses with orjson (C implementation) instead of the stdlib json module
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration (dev-friendly)
@@ -57,10 +63,32 @@ app.include_router(hotel_recommendations_router, prefix="/api/gemini", tags=["ge
 from routers.gmap.router import router as gmap_router
 app.include_router(gmap_router, prefix="/api/gmap", tags=["gmap"])
 
+# Shared HTTP/2 client used by the async Gemini wrapper, and the optional Redis response cache
+from gemini import call_gemini
+from utils import cache
 
-@app.get("/", response_class=HTMLResponse)
-def root():
-    return """
+
+@app.on_event("startup")
+async def on_startup():
+    # Resolve the async Gemini wrapper once (routers read it from app.state) and fail fast if it is missing
+    generate_fn = getattr(call_gemini, "generate_response_async", None)
+    if not callable(generate_fn):
+        raise RuntimeError("generate_response_async not found in gemini.call_gemini")
+    app.state.generate_fn = generate_fn
+
+    # shared HTTP/2 client for async Gemini calls
+    await call_gemini.open_client()
+    await cache.open_cache()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await call_gemini.close_client()
+    await cache.close_cache()
+
+
+# Landing page, built once at import instead of on every request
+ROOT_HTML = """
     <!doctype html>
     <html lang="en">
       <head>
@@ -90,6 +118,11 @@ def root():
     </html>
     """
 
+
+@app.get("/", response_class=HTMLResponse)
+def root():
+    return ROOT_HTML
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
@@ -1,26 +1,88 @@
 # backend/routers/gemini/idealist_to_geo.py
+import asyncio
+import itertools
 import logging
 import traceback
 import os
 import tempfile
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
 
 # import the volunteering search function (same-process call)
 from routers.volunteering.router import search_volunteer_links
 
-# import the gemini wrapper (call_gemini)
-import importlib
+# normalizes Gemini's structured (already JSON-decoded) grouped reply
+from gemini.parse_gemini_latlon_list import normalize_grouped_latlon_lists
 
 # import the helper that attaches links to parsed locations
-from utils.add_links import add_links_to_locations
+from utils.add_links import add_links_to_locations, dedupe_links
+
+# optional Redis response cache (no-op when REDIS_URL is not configured)
+from utils import cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Configuration, read once at import (main.py loads .env before importing the routers)
+_FAST_MODEL = os.environ.get("GEMINI_FAST_MODEL")
+_STRONG_MODEL = os.environ.get("GEMINI_STRONG_MODEL")
+# Model overrides a client may request; the configured FAST/STRONG models are always allowed
+_ALLOWED_MODELS = {
+    m.strip()
+    for m in [_FAST_MODEL or "gemini-2.5-flash", _STRONG_MODEL or ""]
+    + os.environ.get("GEMINI_ALLOWED_MODELS", "gemini-2.5-flash,gemini-2.5-pro,gemini-2.5-flash-lite").split(",")
+    if m.strip()
+}
+_BATCH_MAX_COUNTRIES = max(1, int(os.environ.get("GEMINI_BATCH_MAX_COUNTRIES", "5")))
+_LINKS_PER_CALL = max(1, int(os.environ.get("GEMINI_LINKS_PER_CALL", "50")))
+_GEO_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+_VOLUNTEER_CACHE_TTL = int(os.environ.get("VOLUNTEER_CACHE_TTL_SECONDS", "3600"))
+# Each volunteering search drives a headless Chrome, so cap both the request size and how many run at once
+_MAX_BATCH_REQUEST_COUNTRIES = 20
+_SEARCH_SEMAPHORE = asyncio.Semaphore(max(1, int(os.environ.get("VOLUNTEER_SEARCH_CONCURRENCY", "4"))))
+
+# Gemini structured-output schema for the grouped geocoding reply:
+#   [ {"index": 0, "locations": [ {"latlon": [lat, lon], "country": "japan"}, ... ]}, ... ]
+GROUPED_LOCATIONS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "index": {"type": "INTEGER"},
+            "locations": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "latlon": {"type": "ARRAY", "items": {"type": "NUMBER"}},
+                        "country": {"type": "STRING", "nullable": True},
+                    },
+                    "required": ["latlon", "country"],
+                },
+            },
+        },
+        "required": ["index", "locations"],
+    },
+}
+
+
+class GeminiIdealistBatchRequest(BaseModel):
+    countries: List[str]
+    limit: Optional[int] = Field(None, ge=1, le=200)
+    model: Optional[str] = None
+
+
+class Location(BaseModel):
+    latlon: Tuple[float, float]
+    # lower-case English country name, or null if Gemini didn't know it
+    country: Optional[str] = None
+    link: Optional[str] = None
+    name: Optional[str] = None
+
 
 class GeminiIdealistResponse(BaseModel):
     status: str
@@ -28,40 +90,42 @@ class GeminiIdealistResponse(BaseModel):
     limit: Optional[int] = None
     idealist_json: Dict[str, Any]
     gemini_called: bool
+    # true when the locations were served from the response cache
+    cached: bool = False
     # raw gemini text (kept for debugging) -- may be null
     raw_gemini: Optional[str] = None
-    # parsed locations: list of {"latlon": [lat, lon], "country": <lowercase string or null>, "link": <url or null>}
-    locations: Optional[List[Dict[str, Any]]] = None
+    # parsed locations: list of {"latlon": [lat, lon], "country": <lowercase string or null>, "link": <url or null>, "name": ...}
+    locations: Optional[List[Location]] = None
     error: Optional[str] = None
 
 
-def import_call_gemini_module():
-    try:
-        module = importlib.import_module("gemini.call_gemini")
-        return module
-    except SystemExit:
-        logger.exception("gemini.call_gemini attempted to exit (likely missing GEMINI_API_KEY)")
-        raise
-    except Exception:
-        logger.exception("Failed to import gemini.call_gemini")
-        logger.debug(traceback.format_exc())
-        raise
-
-
-def import_parser_module():
-    """
-    Import the parse_gemini_latlon_list module. Returns the parse function or raises.
-    """
-    try:
-        parser_mod = importlib.import_module("gemini.parse_gemini_latlon_list")
-        parse_fn = getattr(parser_mod, "parse_gemini_latlon_list", None)
-        if not callable(parse_fn):
-            raise ImportError("parse_gemini_latlon_list not found or not callable in gemini.parse_gemini_latlon_list")
-        return parse_fn
-    except Exception:
-        logger.exception("Failed to import gemini.parse_gemini_latlon_list")
-        logger.debug(traceback.format_exc())
-        raise
+# Concise, strict system prompt, built once at import; only the groups JSON is substituted per call.
+# Asks Gemini to return only a JSON array with one object per input group, holding the group's
+# "index" and its "locations": [{"latlon": [lat, lon], "country": "<country>"}]
+_SYSTEM_PROMPT_TEMPLATE = (
+    "You are given a JSON array of groups. Each group has an \"index\", a \"country\" and a \"links\" array of URLs "
+    "pointing to volunteer opportunity pages.\n"
+    "Task: For each group produce a JSON object {\"index\": <same index>, \"locations\": [...]}, where \"locations\" "
+    "holds, for each URL of that group, a JSON object with these exact keys:\n"
+    "  - \"latlon\": an array [lat, lon] where lat and lon are parseable floats (latitude first),\n"
+    "  - \"country\": the country for that lat/lon, as a lower-case English name (for example: 'japan').\n"
+    "Requirements (strict):\n"
+    " - Output MUST be a single valid JSON array and nothing else. Example:\n"
+    "   [ {\"index\": 0, \"locations\": [ {\"latlon\": [35.6897, 139.6922], \"country\": \"japan\"}, {\"latlon\": [...], \"country\": \"country\"} ]} ]\n"
+    " - Do NOT include markdown, backticks, commentary, notes, or any extra text.\n"
+    " - Return exactly one object per input group, using the same \"index\" values as the input.\n"
+    " - Ensure lat and lon are parseable floats and in the order [latitude, longitude].\n"
+    " - Make sure that the countries are full English names in lower case (no country codes).\n"
+    " - Return locations in the same order as the group's links array. If you cannot find coordinates for a link, omit that link's object entirely.\n"
+    " - Each location MUST contain both keys: \"latlon\" and \"country\" (if country is unknown, set it to null explicitly).\n"
+    "Input groups array:\n"
+    "%s\n"
+    "Reply now with only the JSON array (no extra text)."
+)
+
+
+# Guards the read-modify-write of backend/opportunities.json across concurrent requests
+_OPPORTUNITIES_LOCK = asyncio.Lock()
 
 
 def _opportunities_json_path():
@@ -143,171 +207,140 @@ def _append_locations_to_opportunities(country_key: str, locations_list: List[Di
     return None
 
 
-@router.get("/convert_idealist", response_model=GeminiIdealistResponse)
-def convert_idealist_to_geo(
-    country: str = Query(..., min_length=1, description="Country or location to search, e.g. 'Japan'"),
-    limit: Optional[int] = Query(None, ge=1, le=200, description="Optional max number of links to return"),
-    model: Optional[str] = Query(None, description="Optional Gemini model override (e.g. gemini-2.5-flash)"),
-):
-    """
-    Run the volunteering search for `country`, take the resulting JSON, pass only the links
-    to Gemini with a concise system prompt asking for ONLY valid JSON containing {"latlon": [lat, lon], "country": "country"},
-    parse Gemini's output into a list of {"latlon": [lat, lon], "country": <str or None>} dicts,
-    attach the original link for each entry under "link", append that list under backend/opportunities.json[country],
-    and return that list under `locations`.
+async def _geocode_groups(generate_fn, groups: List[Dict[str, Any]], models: List[Optional[str]]):
     """
+    Send one grouped prompt to Gemini and return (raw_text, parsed_groups).
 
-    # 1) Call the existing volunteering search function
-    try:
-        search_result = search_volunteer_links(country=country, limit=limit)
-        search_dict = search_result.dict()
-    except HTTPException as he:
-        raise he
-    except Exception as exc:
-        logger.exception("Error while running volunteering search")
-        raise HTTPException(status_code=500, detail=f"Volunteering search failed: {str(exc)}")
-
-    # 2) Prepare a compact payload for Gemini: only the links list
-    links_list = search_dict.get("links") or search_dict.get("idealist_json", {}).get("links") or []
-    links_json = json.dumps(links_list, ensure_ascii=False)
-
-    # 3) Concise, strict system prompt. Ask Gemini to return only JSON array with objects containing "latlon": [lat, lon] and "country": "<country>"
-    system_prompt = (
-        "You are given a JSON array of URLs (links) pointing to volunteer opportunity pages.\n"
-        "Task: For each URL produce a JSON object with these exact keys:\n"
-        "  - \"latlon\": an array [lat, lon] where lat and lon are parseable floats (latitude first),\n"
-        "  - \"country\": the country for that lat/lon, as a lower-case English name (for example: 'japan').\n"
-        "Requirements (strict):\n"
-        " - Output MUST be a single valid JSON array and nothing else. Example:\n"
-        "   [ {\"latlon\": [35.6897, 139.6922], \"country\": \"japan\"}, {\"latlon\": [...], \"country\": \"country\"} ]\n"
-        " - Do NOT include markdown, backticks, commentary, notes, or any extra text.\n"
-        " - Ensure lat and lon are parseable floats and in the order [latitude, longitude].\n"
-        " - Make sure that the countries are full English names in lower case (no country codes).\n"
-        " - Return entries in the same order as the input links array. If you cannot find coordinates for a link, omit that link's object entirely.\n"
-        " - Each array element MUST contain both keys: \"latlon\" and \"country\" (if country is unknown, set it to null explicitly).\n"
-        "Input links array:\n"
-        f"{links_json}\n"
-        "Reply now with only the JSON array (no extra text)."
-    )
+    Gemini runs in structured-output mode with GROUPED_LOCATIONS_SCHEMA, so the reply is plain JSON
+    and is decoded directly (orjson) instead of going through the tolerant text parser.
 
-    # 4) Import gemini wrapper and call it with a fast default model (configurable)
-    try:
-        cg = import_call_gemini_module()
-    except SystemExit:
-        return GeminiIdealistResponse(
-            status="ok",
-            country=country,
-            limit=limit,
-            idealist_json=search_dict,
-            gemini_called=False,
-            raw_gemini=None,
-            locations=None,
-            error="call_gemini attempted to exit (likely missing GEMINI_API_KEY). Check server logs."
-        )
-    except Exception as exc:
-        return GeminiIdealistResponse(
-            status="ok",
-            country=country,
-            limit=limit,
-            idealist_json=search_dict,
-            gemini_called=False,
-            raw_gemini=None,
-            locations=None,
-            error=f"Import error for gemini wrapper: {str(exc)}"
-        )
+    With several candidate models (FAST + STRONG), the calls are raced speculatively: all are fired
+    at once, the first response that parses wins and the others are cancelled, so a malformed or
+    slow FAST answer costs no extra round-trip. Raises the last error if no model produced a
+    parseable response.
+    """
+    system_prompt = _SYSTEM_PROMPT_TEMPLATE % orjson.dumps(groups).decode()
+    prompt_text = ""  # system prompt contains the instructions
 
-    generate_fn = getattr(cg, "generate_response", None)
-    if not callable(generate_fn):
-        return GeminiIdealistResponse(
-            status="ok",
-            country=country,
-            limit=limit,
-            idealist_json=search_dict,
-            gemini_called=False,
-            raw_gemini=None,
-            locations=None,
-            error="generate_response not found in gemini.call_gemini"
-        )
+    async def _attempt(m: Optional[str]):
+        gemini_text = await generate_fn(system_prompt=system_prompt, prompt=prompt_text, model=m,
+                                        response_schema=GROUPED_LOCATIONS_SCHEMA)
+        gemini_text_str = gemini_text if isinstance(gemini_text, str) else str(gemini_text)
+        try:
+            return gemini_text_str, normalize_grouped_latlon_lists(orjson.loads(gemini_text_str))
+        except Exception as pe:
+            raise ValueError(f"Parsing failed ({m or 'default model'}): {str(pe)}") from pe
+
+    # Fire every candidate on the first attempt; the position in `models` ranks them (later = stronger)
+    rank = {asyncio.create_task(_attempt(m)): pos for pos, m in enumerate(models)}
+    pending = set(rank)
+    last_exc: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Retrieve every finished task's exception first (so none is left unretrieved when we return
+            # early), then, if several succeeded together, prefer the stronger model's answer
+            winner = None
+            for task in sorted(done, key=rank.get, reverse=True):
+                exc = task.exception()
+                if exc is not None:
+                    logger.warning("Gemini attempt failed: %s", exc)
+                    last_exc = exc
+                elif winner is None:
+                    winner = task
+            if winner is not None:
+                logger.debug("Gemini geocoding answered by %s", models[rank[winner]] or "default model")
+                return winner.result()
+    finally:
+        # Cancel the losers and wait for them to unwind, so their HTTP responses are released
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    raise last_exc
+
+
+def _pack_segments(groups: List[Dict[str, Any]]):
+    """
+    Split each country group's links into segments of at most _LINKS_PER_CALL links and pack the
+    segments into prompt batches holding at most _LINKS_PER_CALL links and _BATCH_MAX_COUNTRIES
+    segments, so no single Gemini call runs into context/output limits.
 
-    # Decide model: explicit query param overrides env default which overrides embedded default
-    model_to_use = model or os.environ.get("GEMINI_FAST_MODEL", None)
+    Every segment gets its own prompt index. Returns (segments_by_group, batches) where
+    segments_by_group maps a group index to its segment indices in link order.
+    """
+    segments_by_group: Dict[int, List[int]] = {}
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_links = 0
+    next_index = 0
+    for group in groups:
+        links = group["links"]
+        segment_ids = segments_by_group.setdefault(group["index"], [])
+        for j in range(0, len(links), _LINKS_PER_CALL):
+            chunk = links[j:j + _LINKS_PER_CALL]
+            if current and (current_links + len(chunk) > _LINKS_PER_CALL or len(current) >= _BATCH_MAX_COUNTRIES):
+                batches.append(current)
+                current, current_links = [], 0
+            segment = {"index": next_index, "country": group["country"], "links": chunk}
+            segment_ids.append(next_index)
+            next_index += 1
+            current.append(segment)
+            current_links += len(chunk)
+    if current:
+        batches.append(current)
+    return segments_by_group, batches
+
+
+async def _finish_group(country: str, segments: List[Tuple[List[Dict[str, Any]], List[str]]],
+                        links_list: List[str], inverse: List[int]):
+    """
+    Turn one country's parsed segments into its final locations and append them to
+    backend/opportunities.json.
+
+    segments holds (parsed_locations, segment_links) pairs in link order; together the segment
+    links are the country's de-duplicated links. When every segment was fully answered, the
+    per-unique-link locations are fanned back out to every original link position. Otherwise links
+    are attached per segment, so a gap in one segment can't shift the links of the others.
+    Returns (locations, error) where error combines any attach/length/append problems, or is None.
+    """
+    error = None
+    n_parsed = sum(len(parsed) for parsed, _ in segments)
+    n_unique = sum(len(seg_links) for _, seg_links in segments)
 
+    # Attach the corresponding links (by index) to each parsed location
     try:
-        prompt_text = ""  # system prompt contains the instructions
-        if model_to_use:
-            gemini_text = generate_fn(system_prompt=system_prompt, prompt=prompt_text, model=model_to_use)
+        if all(len(parsed) == len(seg_links) for parsed, seg_links in segments):
+            # Gemini only saw the de-duplicated links: duplicates get a copy of their page's location
+            per_unique = list(itertools.chain.from_iterable(parsed for parsed, _ in segments))
+            parsed_locations = add_links_to_locations([per_unique[k] for k in inverse], links_list)
         else:
-            gemini_text = generate_fn(system_prompt=system_prompt, prompt=prompt_text)
-        gemini_text_str = gemini_text if isinstance(gemini_text, str) else str(gemini_text)
-
-    except SystemExit:
-        logger.exception("call_gemini requested process exit while generating response")
-        return GeminiIdealistResponse(
-            status="ok",
-            country=country,
-            limit=limit,
-            idealist_json=search_dict,
-            gemini_called=False,
-            raw_gemini=None,
-            locations=None,
-            error="call_gemini requested process exit. Check GEMINI_API_KEY and call_gemini implementation."
-        )
+            parsed_locations = list(itertools.chain.from_iterable(
+                add_links_to_locations(parsed, seg_links) for parsed, seg_links in segments
+            ))
     except Exception as exc:
-        logger.exception("Error while calling Gemini")
+        # If helper fails for any reason, keep the parsed locations as-is and report an error
+        logger.exception("Failed to attach links to parsed locations")
         logger.debug(traceback.format_exc())
-        return GeminiIdealistResponse(
-            status="ok",
-            country=country,
-            limit=limit,
-            idealist_json=search_dict,
-            gemini_called=False,
-            raw_gemini=None,
-            locations=None,
-            error=f"Gemini generation failed: {str(exc)}"
-        )
-
-    # 5) Parse Gemini's raw response using your parser
-    parsed_locations = None
-    parse_error = None
-    try:
-        parse_fn = import_parser_module()
-        parsed_locations = parse_fn(gemini_text_str)
-        # parsed_locations should be list of {"latlon": [lat, lon], "country": <str or None>} dicts
-        if parsed_locations is None:
-            parsed_locations = []
-    except Exception as pe:
-        parse_error = f"Parsing failed: {str(pe)}"
-        logger.exception("Error while parsing Gemini output")
-        logger.debug(traceback.format_exc())
-        parsed_locations = None
-
-    # 5.5) Attach the corresponding links (by index) to each parsed location
-    if parsed_locations is not None:
-        try:
-            parsed_locations = add_links_to_locations(parsed_locations, links_list)
-        except Exception as exc:
-            # If helper fails for any reason, keep parsed_locations as-is and report an error
-            logger.exception("Failed to attach links to parsed locations")
-            logger.debug(traceback.format_exc())
-            if parse_error:
-                parse_error = f"{parse_error}; attach_links_failed: {str(exc)}"
-            else:
-                parse_error = f"attach_links_failed: {str(exc)}"
+        parsed_locations = list(itertools.chain.from_iterable(parsed for parsed, _ in segments))
+        error = f"attach_links_failed: {str(exc)}"
 
-    # Optionally: If parsed_locations length mismatches links_list length, include a warning in error
-    if parsed_locations is not None and len(parsed_locations) != len(links_list):
+    # Optionally: If the parsed count mismatches the (unique) links count, include a warning in error
+    if n_parsed != n_unique:
         # keep parsed_locations but warn in error field
-        warning = f"Parsed {len(parsed_locations)} entries but found {len(links_list)} links"
-        if parse_error:
-            parse_error = f"{parse_error}; {warning}"
+        warning = f"Parsed {n_parsed} entries but found {n_unique} links"
+        if error:
+            error = f"{error}; {warning}"
         else:
-            parse_error = warning
+            error = warning
 
-    # 5.75) Append parsed_locations to backend/opportunities.json under the country key
+    # Append parsed_locations to backend/opportunities.json under the country key
     append_error = None
     if parsed_locations:
         try:
-            append_error = _append_locations_to_opportunities(country, parsed_locations)
+            # file IO + fsync runs off the event loop; the lock serializes the read-modify-write cycles
+            async with _OPPORTUNITIES_LOCK:
+                append_error = await asyncio.to_thread(_append_locations_to_opportunities, country, parsed_locations)
             if append_error:
                 logger.error("Appending to opportunities.json failed: %s", append_error)
         except Exception as e:
@@ -315,23 +348,285 @@ def convert_idealist_to_geo(
             logger.exception("Unexpected error while appending to opportunities.json")
             logger.debug(traceback.format_exc())
 
-    # Combine parse_error and append_error into a single error message for the response if present
-    combined_error = None
-    if parse_error and append_error:
-        combined_error = f"{parse_error}; append_error: {append_error}"
-    elif parse_error:
-        combined_error = parse_error
+    # Combine the attach error and append_error into a single error message if present
+    if error and append_error:
+        error = f"{error}; append_error: {append_error}"
     elif append_error:
-        combined_error = f"append_error: {append_error}"
-
-    # 6) Return the parsed list under `locations`. Keep raw_gemini for debugging.
-    return GeminiIdealistResponse(
-        status="ok",
-        country=country,
-        limit=limit,
-        idealist_json=search_dict,
-        gemini_called=True,
-        raw_gemini=gemini_text_str,
-        locations=parsed_locations,
-        error=combined_error
+        error = f"append_error: {append_error}"
+
+    return parsed_locations, error
+
+
+@cache.redis_cached(
+    ttl=_VOLUNTEER_CACHE_TTL,
+    key=lambda country, limit: f"vol:{country.strip().lower()}:{limit}",
+)
+async def _search_links(country: str, limit: Optional[int]) -> List[str]:
+    """
+    Run the volunteering search for one country and return only its links list.
+    Selenium is blocking, so the search runs off the event loop, at most VOLUNTEER_SEARCH_CONCURRENCY at a time.
+    """
+    async with _SEARCH_SEMAPHORE:
+        search_result = await asyncio.to_thread(search_volunteer_links, country=country, limit=limit)
+    # read the attribute directly instead of dumping the whole model with .dict()
+    return (
+        getattr(search_result, "links", None)
+        or getattr(getattr(search_result, "idealist_json", None), "links", None)
+        or []
+    )
+
+
+def _check_model(model: Optional[str]) -> None:
+    """Reject model overrides outside _ALLOWED_MODELS (400), before they reach Gemini or its rate limiters."""
+    if model and model not in _ALLOWED_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"'model' must be one of: {', '.join(sorted(_ALLOWED_MODELS))}",
+        )
+
+
+def _search_error_detail(exc: BaseException) -> str:
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    return f"Volunteering search failed: {str(exc)}"
+
+
+async def _convert_countries(
+    generate_fn,
+    countries: List[str],
+    limit: Optional[int],
+    model: Optional[str],
+    raise_search_errors: bool = False,
+) -> List[GeminiIdealistResponse]:
+    """
+    Batch path shared by both endpoints: run the volunteering search for every country concurrently,
+    send their links to Gemini as grouped prompts (countries split into segments of bounded size,
+    several segments per prompt, prompts sent concurrently), parse each grouped reply once and stitch
+    the locations back together per country.
+
+    generate_fn is the async Gemini wrapper resolved at startup (app.state.generate_fn).
+    Returns one GeminiIdealistResponse per input country, in input order. If raise_search_errors is
+    set, a failing search raises (HTTPException) instead of producing an error entry.
+    """
+
+    # 1) Call the existing volunteering search function for every country (cached per country/limit)
+    search_results = await asyncio.gather(
+        *[_search_links(c, limit) for c in countries],
+        return_exceptions=True,
+    )
+
+    search_dicts: List[Optional[Dict[str, Any]]] = []
+    search_errors: List[Optional[str]] = []
+    for country, result in zip(countries, search_results):
+        if isinstance(result, BaseException):
+            if raise_search_errors:
+                if isinstance(result, HTTPException):
+                    raise result
+                logger.error("Error while running volunteering search", exc_info=result)
+                raise HTTPException(status_code=500, detail=_search_error_detail(result))
+            logger.error("Volunteering search failed for %s", country, exc_info=result)
+            search_dicts.append(None)
+            search_errors.append(_search_error_detail(result))
+        else:
+            # Same shape as the volunteering SearchResponse
+            search_dicts.append({"country": country, "found": len(result), "links": result})
+            search_errors.append(None)
+
+    # 2) Prepare a compact payload for Gemini: only the links, tagged with the country index
+    #    Duplicate links (same page, different query string etc.) are only sent once.
+    #    Countries whose search found no links are answered right away, without cache lookups or Gemini.
+    links_lists: List[List[str]] = []
+    inverses: Dict[int, List[int]] = {}
+    groups: List[Dict[str, Any]] = []
+    outcomes: Dict[int, Dict[str, Any]] = {}  # per-country outcome, filled in as the pipeline progresses
+    for i, (country, search_dict) in enumerate(zip(countries, search_dicts)):
+        if search_dict is None:
+            links_lists.append([])
+            continue
+        links_list = search_dict["links"]
+        links_lists.append(links_list)
+        outcomes[i] = {"gemini_called": False, "cached": False, "raw_gemini": None, "locations": None, "error": None}
+        if not links_list:
+            outcomes[i]["locations"] = []
+            continue
+        unique_links, inverses[i] = dedupe_links(links_list)
+        groups.append({"index": i, "country": country, "links": unique_links})
+
+    def _responses() -> List[GeminiIdealistResponse]:
+        out = []
+        for i, country in enumerate(countries):
+            if search_dicts[i] is None:
+                out.append(GeminiIdealistResponse(
+                    status="error",
+                    country=country,
+                    limit=limit,
+                    idealist_json={},
+                    gemini_called=False,
+                    error=search_errors[i],
+                ))
+                continue
+            out.append(GeminiIdealistResponse(
+                status="ok",
+                country=country,
+                limit=limit,
+                idealist_json=search_dicts[i],
+                **outcomes[i],
+            ))
+        return out
+
+    if not groups:
+        return _responses()
+
+    # Decide model: explicit query param overrides env default which overrides embedded default.
+    # Without an explicit override, a configured STRONG model is raced against the FAST one.
+    if model:
+        models: List[Optional[str]] = [model]
+    else:
+        models = [_FAST_MODEL]
+        if _STRONG_MODEL and _STRONG_MODEL != _FAST_MODEL:
+            models.append(_STRONG_MODEL)
+    models_key = ",".join(m or "default" for m in models)
+
+    # 3) Cache lookups: the final locations per (country, model, links), then the parsed geo answer
+    #    per (model, links) so a different country searching to the same links reuses it. The final key
+    #    uses the raw links (duplicates and order included), since the cached locations mirror them 1:1
+    final_keys = {
+        g["index"]: cache.make_key("geo:final", g["country"].lower(), models_key,
+                                   orjson.dumps(links_lists[g["index"]]).decode())
+        for g in groups
+    }
+    parsed_keys = {
+        g["index"]: cache.make_key("geo:parsed", models_key, orjson.dumps(g["links"]).decode())
+        for g in groups
+    }
+
+    async def _lookup(group: Dict[str, Any]):
+        final = await cache.get_json(final_keys[group["index"]])
+        if final is not None:
+            return final, None
+        return None, await cache.get_json(parsed_keys[group["index"]])
+
+    pending_groups: List[Dict[str, Any]] = []
+    for group, (final, parsed) in zip(groups, await asyncio.gather(*[_lookup(g) for g in groups])):
+        i = group["index"]
+        if final is not None:
+            outcomes[i].update(cached=True, locations=final)
+        elif parsed is not None:
+            locations, error = await _finish_group(group["country"], [(parsed, group["links"])],
+                                                   links_lists[i], inverses[i])
+            outcomes[i].update(cached=True, locations=locations, error=error)
+            if error is None:
+                await cache.set_json(final_keys[i], locations, _GEO_CACHE_TTL)
+        else:
+            pending_groups.append(group)
+
+    if not pending_groups:
+        return _responses()
+
+    # 4) Call Gemini: each country's links are split into segments of at most GEMINI_LINKS_PER_CALL links,
+    #    segments are packed into prompts (same link cap, at most GEMINI_BATCH_MAX_COUNTRIES segments each),
+    #    and the prompts are sent concurrently
+    segments_by_group, batches = _pack_segments(pending_groups)
+    batch_results = await asyncio.gather(
+        *[_geocode_groups(generate_fn, batch, models) for batch in batches],
+        return_exceptions=True,
     )
+
+    # 5) Collect each segment's parsed locations, then stitch them back per country in input order
+    parsed_by_segment: Dict[int, List[Dict[str, Any]]] = {}
+    links_by_segment: Dict[int, List[str]] = {}
+    raw_by_segment: Dict[int, str] = {}
+    error_by_segment: Dict[int, str] = {}
+    for batch, result in zip(batches, batch_results):
+        if isinstance(result, BaseException):
+            logger.error("Error while calling Gemini", exc_info=result)
+            for segment in batch:
+                error_by_segment[segment["index"]] = f"Gemini generation failed: {str(result)}"
+            continue
+
+        gemini_text_str, parsed_groups = result
+        for segment in batch:
+            sid = segment["index"]
+            # With a single segment, Gemini may number it 0 whatever the input index was
+            parsed = parsed_groups.get(sid)
+            if parsed is None and len(batch) == 1:
+                parsed = parsed_groups.get(0)
+            if parsed is None:
+                error_by_segment[sid] = f"Gemini reply has no group for index {sid}"
+                continue
+            parsed_by_segment[sid] = parsed
+            links_by_segment[sid] = segment["links"]
+            raw_by_segment[sid] = gemini_text_str
+
+    for group in pending_groups:
+        i = group["index"]
+        segment_ids = segments_by_group[i]
+
+        failed = [error_by_segment[sid] for sid in segment_ids if sid in error_by_segment]
+        if failed:
+            outcomes[i]["error"] = failed[0]
+            continue
+
+        segments = [(parsed_by_segment[sid], links_by_segment[sid]) for sid in segment_ids]
+        parsed_locations = list(itertools.chain.from_iterable(parsed for parsed, _ in segments))
+        raw_gemini = "\n".join(dict.fromkeys(raw_by_segment[sid] for sid in segment_ids))
+
+        locations, error = await _finish_group(group["country"], segments, links_lists[i], inverses[i])
+        outcomes[i].update(gemini_called=True, raw_gemini=raw_gemini, locations=locations, error=error)
+
+        # Only cache complete answers: a short or padded reply is more likely a model hiccup than the truth
+        if error is None:
+            await cache.set_json(parsed_keys[i], parsed_locations, _GEO_CACHE_TTL)
+            await cache.set_json(final_keys[i], locations, _GEO_CACHE_TTL)
+
+    # 6) Return the parsed lists under `locations`. Keep raw_gemini for debugging.
+    return _responses()
+
+
+@router.get("/convert_idealist", response_model=GeminiIdealistResponse)
+async def convert_idealist_to_geo(
+    request: Request,
+    country: str = Query(..., min_length=1, description="Country or location to search, e.g. 'Japan'"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Optional max number of links to return"),
+    model: Optional[str] = Query(None, description="Optional Gemini model override (e.g. gemini-2.5-flash)"),
+):
+    """
+    Run the volunteering search for `country`, take the resulting JSON, pass only the links
+    to Gemini with a concise system prompt asking for ONLY valid JSON containing {"latlon": [lat, lon], "country": "country"},
+    parse Gemini's output into a list of {"latlon": [lat, lon], "country": <str or None>} dicts,
+    attach the original link for each entry under "link", append that list under backend/opportunities.json[country],
+    and return that list under `locations`.
+
+    Thin wrapper over the batch path with a single country.
+    """
+    _check_model(model)
+    results = await _convert_countries(request.app.state.generate_fn, [country], limit, model, raise_search_errors=True)
+    return results[0]
+
+
+@router.post("/convert_idealist_batch", response_model=List[GeminiIdealistResponse])
+async def convert_idealist_batch(req: GeminiIdealistBatchRequest, request: Request):
+    """
+    Same as /convert_idealist for several countries at once: the searches run concurrently (bounded by
+    VOLUNTEER_SEARCH_CONCURRENCY) and the links are geocoded by grouped Gemini calls sent concurrently.
+    Countries are de-duplicated case-insensitively (first spelling wins); at most 20 distinct countries
+    are accepted per request. Returns one entry per distinct country, in request order;
+    a country whose search failed gets status="error" with the reason under `error`.
+    """
+    _check_model(req.model)
+
+    countries: List[str] = []
+    seen = set()
+    for c in req.countries:
+        if isinstance(c, str) and c.strip() and c.strip().lower() not in seen:
+            seen.add(c.strip().lower())
+            countries.append(c.strip())
+    if not countries:
+        raise HTTPException(status_code=400, detail="'countries' must contain at least one non-empty country")
+    if len(countries) > _MAX_BATCH_REQUEST_COUNTRIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"'countries' must contain at most {_MAX_BATCH_REQUEST_COUNTRIES} distinct countries",
+        )
+
+    return await _convert_countries(request.app.state.generate_fn, countries, req.limit, req.model)
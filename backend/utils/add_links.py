@@ -17,19 +17,35 @@ Behavior:
   - If no slug part exists (no dash in last segment), name will be None.
   - The function returns a NEW list with shallow-copied dicts (does not mutate input).
 
+dedupe_links() collapses links that point to the same page (same URL once the query string,
+fragment and trailing slash are dropped), so each page only needs to be geocoded once.
+
 Notes:
   - If there are more links than locations, extra links are ignored (warning logged).
   - If there are more locations than links, extra locations receive "link": None and "name": None.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlparse, unquote
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, urlunparse, unquote
 
 logger = logging.getLogger(__name__)
 
 
 def _extract_name_from_link(link: str) -> Optional[str]:
+    """
+    Extract a human-friendly uppercase name from the last segment of the URL (see _extract_name_from_url).
+    """
+    if not link or not isinstance(link, str):
+        return None
+    return _extract_name_from_url(link)
+
+
+# The same opportunity links come back on every search for a country, and duplicates share one
+# location after de-duplication, so names are memoized per URL.
+@lru_cache(maxsize=4096)
+def _extract_name_from_url(link: str) -> Optional[str]:
     """
     Extract a human-friendly uppercase name from the last segment of the URL.
 
@@ -40,8 +56,6 @@ def _extract_name_from_link(link: str) -> Optional[str]:
       - replace remaining dashes with spaces, collapse whitespace, strip, and uppercase.
       - return None if no remainder after the first dash.
     """
-    if not link or not isinstance(link, str):
-        return None
     try:
         parsed = urlparse(link)
         path = parsed.path or ""
@@ -74,6 +88,42 @@ def _extract_name_from_link(link: str) -> Optional[str]:
         return None
 
 
+def normalize_link(link: str) -> str:
+    """
+    Normalize a URL for de-duplication: lower-case scheme and host, drop the query string
+    and fragment, and strip trailing slashes from the path.
+    """
+    if not link or not isinstance(link, str):
+        return link
+    try:
+        parsed = urlparse(link.strip())
+        return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path.rstrip("/"), "", "", ""))
+    except Exception:
+        return link
+
+
+def dedupe_links(links: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    De-duplicate links by normalize_link, keeping the first original URL of each page.
+
+    Returns (unique, inverse) where unique is the list of first-seen links and inverse maps every
+    input position to its index in unique, so per-unique results fan back out with
+    [results[k] for k in inverse].
+    """
+    unique: List[str] = []
+    inverse: List[int] = []
+    position_by_norm: Dict[str, int] = {}
+    for link in links:
+        norm = normalize_link(link)
+        k = position_by_norm.get(norm)
+        if k is None:
+            k = len(unique)
+            position_by_norm[norm] = k
+            unique.append(link)
+        inverse.append(k)
+    return unique, inverse
+
+
 def add_links_to_locations(locations: Optional[List[Dict[str, Any]]],
                            links: Optional[List[str]]) -> List[Dict[str, Any]]:
     """
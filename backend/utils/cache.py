@@ -0,0 +1,128 @@
+# backend/utils/cache.py
+"""
+Optional Redis cache for expensive lookups (e.g. Gemini geocoding results).
+
+The cache is enabled when REDIS_URL is set and the `redis` package is installed.
+Otherwise every lookup is a miss and every write is a no-op, so callers never have
+to special-case it. Redis errors are logged and treated the same way: the cache is
+best-effort and must never fail a request.
+
+Values are stored as JSON. `redis_cached` wraps an async function with the same
+get / compute-on-miss / SETEX pattern. The connection is opened on FastAPI startup and closed
+on shutdown (see main.py).
+"""
+
+import functools
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit
+
+import orjson
+
+try:
+    import redis.asyncio as redis_asyncio  # type: ignore
+except Exception:
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+async def open_cache():
+    """Connect to REDIS_URL if configured. Returns the client, or None when caching is disabled."""
+    global _redis
+    if _redis is not None:
+        return _redis
+
+    url = os.environ.get("REDIS_URL")
+    if not url:
+        logger.info("REDIS_URL not set; response cache disabled.")
+        return None
+    if redis_asyncio is None:
+        logger.warning("REDIS_URL is set but the redis package is not installed; response cache disabled.")
+        return None
+
+    try:
+        client = redis_asyncio.from_url(url)
+        await client.ping()
+    except Exception as e:
+        # log the host only: REDIS_URL usually carries the password
+        try:
+            where = urlsplit(url).hostname or "REDIS_URL"
+        except ValueError:
+            where = "REDIS_URL"
+        logger.warning(f"Failed to connect to Redis at {where}: {e}; response cache disabled.")
+        return None
+
+    _redis = client
+    logger.info("Redis response cache enabled.")
+    return _redis
+
+
+async def close_cache():
+    """Close the Redis connection (safe to call more than once)."""
+    global _redis
+    if _redis is not None:
+        try:
+            # redis-py 5 deprecates close() in favour of aclose()
+            aclose = getattr(_redis, "aclose", None) or _redis.close
+            await aclose()
+        except Exception:
+            logger.debug("Error while closing Redis connection", exc_info=True)
+    _redis = None
+
+
+def make_key(prefix: str, *parts: str) -> str:
+    """Build a compact cache key: '<prefix>:<sha256 of the '|'-joined parts>'."""
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+async def get_json(key: str) -> Optional[Any]:
+    """Return the cached JSON value for key, or None on a miss (or when the cache is disabled)."""
+    if _redis is None:
+        return None
+    try:
+        raw = await _redis.get(key)
+        if raw is None:
+            return None
+        return orjson.loads(raw)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+
+
+async def set_json(key: str, value: Any, ttl: int) -> None:
+    """Store value as JSON under key for ttl seconds (no-op when the cache is disabled)."""
+    if _redis is None:
+        return
+    try:
+        await _redis.setex(key, ttl, orjson.dumps(value))
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+def redis_cached(ttl: int, key: Callable[..., str]):
+    """
+    Decorator for async functions: return the cached JSON value for key(*args, **kwargs) if present,
+    otherwise await the function and SETEX its result for ttl seconds.
+
+    Only cache plain JSON-able data (e.g. a list of links), not whole HTTP responses. Falsy results
+    (None, empty list) are not cached, since they usually mean a transient failure upstream.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            cached = await get_json(cache_key)
+            if cached is not None:
+                return cached
+            result = await fn(*args, **kwargs)
+            if result:
+                await set_json(cache_key, result, ttl)
+            return result
+        return wrapper
+    return decorator